@@ -15,19 +15,34 @@ Usage:
   # Create snapshot with additional ignore patterns
   python this_script.py fm ./proj -o out.md --ignore "*.log" --ignore "temp/"
 
+  # Create snapshot without printing a line per file
+  python this_script.py fm ./proj -o out.md --quiet
+
   # Recreate folder structure FROM 'snapshot.md' TO 'recreated_project' (Markdown -> Folder)
   python this_script.py mf snapshot.md -o ./recreated_project
 """
 
 import os
+import stat
+import codecs
 import mimetypes
 import fnmatch
+import functools
+import re
 import platform
 import argparse
 import sys
+import collections
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
 ENCODING = 'utf-8'
+IO_BUFFER_SIZE = 1 << 20     # 1 MiB; the 8 KiB io.DEFAULT_BUFFER_SIZE is far too small for the snapshot stream.
+READ_WORKERS = 16            # Threads reading source files while the snapshot is written.
+READ_AHEAD = 64              # Files in flight ahead of the writer.
+INLINE_READ_LIMIT = 1 << 17  # Larger files are streamed by the writer instead of read ahead.
+BINARY_PROBE_SIZE = 4096     # Leading bytes checked for NUL before a file is treated as text.
+LOG_BATCH = 256              # Per-file log lines buffered before a single stdout write.
 
 # --- Default Ignore Patterns ---
 DEFAULT_IGNORE_PATTERNS = [
@@ -40,68 +55,169 @@ DEFAULT_IGNORE_PATTERNS = [
     'settings.local.py',"package-lock.json",".next" , "tsconfig.tsbuildinfo","myenv"
 ]
 
-# --- Core Helper Functions (No Changes Here) ---
+# --- Language Detection Maps ---
+mimetypes.init()
+_LANG_MAP_MIME = {
+    "text/x-python": "python", "application/x-python-code": "python",
+    "text/javascript": "javascript", "application/javascript": "javascript",
+    "text/html": "html", "text/css": "css", "application/json": "json",
+    "application/xml": "xml", "text/xml": "xml",
+    "text/x-java-source": "java", "text/x-java": "java",
+    "text/x-csrc": "c", "text/x-c": "c", "text/x-c++src": "cpp", "text/x-c++": "cpp",
+    "application/x-sh": "bash", "text/x-shellscript": "bash",
+    "text/markdown": "markdown", "text/x-yaml": "yaml", "application/x-yaml": "yaml",
+    "text/plain": ""
+}
+_LANG_MAP_EXT = {
+    ".py": "python", ".pyw": "python", ".js": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".html": "html", ".htm": "html", ".css": "css", ".java": "java", ".cpp": "cpp", ".cxx": "cpp",
+    ".cc": "cpp", ".hpp": "cpp", ".hxx": "cpp", ".c": "c", ".h": "c", ".cs": "csharp", ".php": "php",
+    ".rb": "ruby", ".go": "go", ".rs": "rust", ".ts": "typescript", ".tsx": "typescript",
+    ".json": "json", ".xml": "xml", ".yaml": "yaml", ".yml": "yaml", ".sh": "bash", ".bash": "bash",
+    ".sql": "sql", ".md": "markdown", ".markdown": "markdown", ".txt": ""
+}
+
+# --- Core Helper Functions ---
 
 def is_ignored(relative_path, ignore_patterns):
     normalized_path = relative_path.replace("\\", "/")
-    basename = os.path.basename(normalized_path)
-    is_case_sensitive_fs = platform.system() != "Windows"
-    for pattern in ignore_patterns:
-        if fnmatch.fnmatch(basename, pattern) or \
-           (not is_case_sensitive_fs and fnmatch.fnmatch(basename.lower(), pattern.lower())):
-            return True
-        if fnmatch.fnmatch(normalized_path, pattern) or \
-           (not is_case_sensitive_fs and fnmatch.fnmatch(normalized_path.lower(), pattern.lower())):
-            return True
-    return False
+    basename_re, path_re = _compile_ignore_cached(tuple(ignore_patterns))
+    return is_ignored_fast(normalized_path, os.path.basename(normalized_path), basename_re, path_re)
+
+def _compile_ignore(patterns):
+    """Compiles glob patterns into (basename_re, path_re) alternation regexes.
+
+    Patterns containing '/' are matched against the full relative path, the rest
+    against the basename. Either regex is None when it has no patterns.
+    Matching then runs entirely in the C `re` engine, which is why there is no
+    compiled extension for is_ignored; the script stays a dependency-free file.
+    """
+    flags = re.IGNORECASE if platform.system() == "Windows" else 0
+    basename_patterns = [p for p in patterns if "/" not in p]
+    path_patterns = [p for p in patterns if "/" in p]
+    def _alternation(group):
+        if not group: return None
+        return re.compile("|".join("(?:" + fnmatch.translate(p) + ")" for p in group), flags)
+    return _alternation(basename_patterns), _alternation(path_patterns)
+
+@functools.lru_cache(maxsize=32)
+def _compile_ignore_cached(patterns):
+    # is_ignored is called with the same pattern list for every path; split and compile it once.
+    return _compile_ignore(patterns)
+
+def is_ignored_fast(rel_path, basename, basename_re, path_re, basename_cache=None):
+    if basename_cache is None:
+        if basename_re is not None and basename_re.match(basename): return True
+    else:
+        hit = basename_cache.get(basename)
+        if hit is None:
+            hit = basename_cache[basename] = basename_re is not None and basename_re.match(basename) is not None
+        if hit: return True
+    return path_re is not None and path_re.match(rel_path) is not None
 
 def guess_language(filepath):
-    mimetypes.init()
-    mime_type, _ = mimetypes.guess_type(filepath)
-    if mime_type:
-        lang_map_mime = {
-            "text/x-python": "python", "application/x-python-code": "python",
-            "text/javascript": "javascript", "application/javascript": "javascript",
-            "text/html": "html", "text/css": "css", "application/json": "json",
-            "application/xml": "xml", "text/xml": "xml",
-            "text/x-java-source": "java", "text/x-java": "java",
-            "text/x-csrc": "c", "text/x-c": "c", "text/x-c++src": "cpp", "text/x-c++": "cpp",
-            "application/x-sh": "bash", "text/x-shellscript": "bash",
-            "text/markdown": "markdown", "text/x-yaml": "yaml", "application/x-yaml": "yaml",
-            "text/plain": ""
-        }
-        if mime_type in lang_map_mime: return lang_map_mime[mime_type]
-        if mime_type.startswith("text/"): return ""
     _, ext = os.path.splitext(filepath.lower())
-    lang_map_ext = {
-        ".py": "python", ".pyw": "python", ".js": "javascript", ".mjs": "javascript", ".cjs": "javascript",
-        ".html": "html", ".htm": "html", ".css": "css", ".java": "java", ".cpp": "cpp", ".cxx": "cpp",
-        ".cc": "cpp", ".hpp": "cpp", ".hxx": "cpp", ".c": "c", ".h": "c", ".cs": "csharp", ".php": "php",
-        ".rb": "ruby", ".go": "go", ".rs": "rust", ".ts": "typescript", ".tsx": "typescript",
-        ".json": "json", ".xml": "xml", ".yaml": "yaml", ".yml": "yaml", ".sh": "bash", ".bash": "bash",
-        ".sql": "sql", ".md": "markdown", ".markdown": "markdown", ".txt": ""
-    }
-    return lang_map_ext.get(ext, "")
-
-def write_code_to_file(output_dir, relative_filepath, code_lines, encoding=ENCODING):
-    safe_relative_path = os.path.normpath(relative_filepath).replace("\\", "/")
-    if safe_relative_path.startswith("..") or os.path.isabs(safe_relative_path):
+    language = _LANG_MAP_EXT.get(ext)
+    if language is not None: return language
+    mime_type, _ = mimetypes.guess_type(filepath)
+    if mime_type: return _LANG_MAP_MIME.get(mime_type, "")
+    return ""
+
+@functools.lru_cache(maxsize=None)
+def _fence_bytes(encoding):
+    """Returns ({language: opening fence}, closing fence) encoded with `encoding`, built once per encoding."""
+    languages = set(_LANG_MAP_EXT.values()) | set(_LANG_MAP_MIME.values())
+    return {lang: f"```{lang}\n".encode(encoding) for lang in languages}, "\n```\n\n".encode(encoding)
+
+def reject_nul(data, encoding=ENCODING):
+    """Raises UnicodeDecodeError if the first BINARY_PROBE_SIZE bytes of data contain a NUL byte."""
+    nul = data.find(b"\x00", 0, BINARY_PROBE_SIZE)
+    if nul != -1: raise UnicodeDecodeError(encoding, data, nul, nul + 1, "NUL byte, file looks binary")
+
+def read_text_file(filepath, encoding=ENCODING, limit=INLINE_READ_LIMIT):
+    """Returns the bytes of filepath, or None if it is larger than `limit` or not a regular file.
+
+    Reads with a single os.read sized from fstat, skipping the BufferedReader
+    setup that dominates the cost of small files. Raises UnicodeDecodeError if
+    the file is not valid `encoding` text.
+    """
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode) or st.st_size > limit: return None
+        data = os.read(fd, st.st_size + 1)  # One spare byte reveals a file that grew since fstat.
+    finally:
+        os.close(fd)
+    if len(data) > st.st_size: return None
+    reject_nul(data, encoding)
+    data.decode(encoding)
+    return data
+
+def copy_text_file(filepath, dest, encoding=ENCODING):
+    """Streams filepath into the binary file object dest in IO_BUFFER_SIZE chunks.
+
+    Raises UnicodeDecodeError if the file is not valid `encoding` text; bytes
+    already copied are left in dest for the caller to roll back. The first
+    BINARY_PROBE_SIZE bytes are checked before anything is copied, so most
+    binaries are rejected without reading them in full. With dest=None the file
+    is only validated. Regular files are copied only up to their size when
+    opened, so a file that keeps growing (such as dest itself) cannot loop forever.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(filepath, "rb", buffering=IO_BUFFER_SIZE) as src:
+        st = os.fstat(src.fileno())
+        remaining = st.st_size if stat.S_ISREG(st.st_mode) else None
+        head = src.read(BINARY_PROBE_SIZE if remaining is None else min(BINARY_PROBE_SIZE, remaining))
+        reject_nul(head, encoding)
+        decoder.decode(head)
+        if dest is not None: dest.write(head)
+        if remaining is not None: remaining -= len(head)
+        while remaining is None or remaining > 0:
+            chunk = src.read(IO_BUFFER_SIZE if remaining is None else min(IO_BUFFER_SIZE, remaining))
+            if not chunk: break
+            decoder.decode(chunk)
+            if dest is not None: dest.write(chunk)
+            if remaining is not None: remaining -= len(chunk)
+    decoder.decode(b"", final=True)
+
+def _open_marker_block(md_file, block_start, streaming):
+    """Prepares md_file for a failed block's marker and returns the text that opens it.
+
+    A recorded block_start truncates the partial block away. Without one (a pipe,
+    FIFO or device), a block that failed mid-stream is left open, so the marker lands
+    inside its fence and extract_codebase skips the partial content.
+    """
+    if block_start is not None:
+        md_file.seek(block_start); md_file.truncate()
+    elif streaming:
+        return "\n"
+    return "```\n"
+
+def write_code_to_file(abs_output_dir, relative_filepath, code, encoding=ENCODING, created_dirs=None):
+    """Writes `code` (bytes, or an iterable of str lines encoded with `encoding`) to relative_filepath under abs_output_dir.
+
+    abs_output_dir must already be absolute and normalised (os.path.abspath).
+    created_dirs, if given, is a set of directories already created during this
+    run; it lets files sharing a directory skip os.makedirs.
+    """
+    # Normalising after mapping '\\' to '/' resolves every '..' up front, so a
+    # path that survives this check cannot escape abs_output_dir.
+    safe_relative_path = os.path.normpath(relative_filepath.replace("\\", "/")).replace("\\", "/")
+    if safe_relative_path.startswith("..") or os.path.isabs(safe_relative_path) or os.path.splitdrive(safe_relative_path)[0]:
         print(f"[WRITE] [WARN] Skipping potentially unsafe path: {relative_filepath}")
         return False
-    abs_output_dir = os.path.abspath(output_dir)
     full_path = os.path.join(abs_output_dir, safe_relative_path)
-    abs_full_path = os.path.abspath(full_path)
-    if not abs_full_path.startswith(abs_output_dir + os.path.sep) and abs_full_path != abs_output_dir:
-        print(f"[WRITE] [ERROR] Security Error: Attempted write outside target directory: {relative_filepath} -> {abs_full_path}")
-        return False
     dir_name = os.path.dirname(full_path)
     try:
-        if dir_name: os.makedirs(dir_name, exist_ok=True)
+        if dir_name and (created_dirs is None or dir_name not in created_dirs):
+            os.makedirs(dir_name, exist_ok=True)
+            if created_dirs is not None: created_dirs.add(dir_name)
         if os.path.isdir(full_path):
              print(f"[WRITE] [ERROR] Cannot write file. Path exists and is a directory: {full_path}")
              return False
-        with open(full_path, "w", encoding=encoding) as outfile:
-            outfile.writelines(code_lines)
+        if not isinstance(code, (bytes, bytearray)): code = "".join(code).encode(encoding)
+        with open(full_path, "wb") as outfile:
+            outfile.write(code)
         return True
     except OSError as e:
         print(f"[WRITE] [ERROR] OS Error writing file {full_path}: {e}")
@@ -110,13 +226,13 @@ def write_code_to_file(output_dir, relative_filepath, code_lines, encoding=ENCOD
         print(f"[WRITE] [ERROR] General Error writing file {full_path}: {e}")
         return False
 
-# --- Main Logic Functions (No Changes Here) ---
+# --- Main Logic Functions ---
 
-def create_codebase_snapshot(root_dir, output_file, encoding=ENCODING, base_ignore_patterns=DEFAULT_IGNORE_PATTERNS, user_ignore_patterns=[]):
+def create_codebase_snapshot(root_dir, output_file, encoding=ENCODING, base_ignore_patterns=DEFAULT_IGNORE_PATTERNS, user_ignore_patterns=[], quiet=False):
     processed_files_count = 0
     ignored_items_count = 0
     errors = []
-    all_ignore_patterns = list(set(base_ignore_patterns + user_ignore_patterns))
+    all_ignore_patterns = list(dict.fromkeys(list(base_ignore_patterns) + list(user_ignore_patterns)))  # Dedup, keeping order.
     abs_root = os.path.abspath(root_dir)
     if not os.path.isdir(abs_root):
         print(f"[ERROR] Source directory not found or not a directory: {abs_root}", file=sys.stderr)
@@ -128,49 +244,107 @@ def create_codebase_snapshot(root_dir, output_file, encoding=ENCODING, base_igno
     print(f"  Output: {output_file}")
     print(f"  Ignoring: {all_ignore_patterns}")
     print("-" * 60)
-    try:
-        with open(output_file, "w", encoding=encoding) as md_file:
-            md_file.write("# Codebase Snapshot\n\n")
-            md_file.write(f"Source Directory: `{os.path.basename(abs_root)}`\n\n")
-            for dirpath, dirnames, filenames in os.walk(abs_root, topdown=True):
-                dirs_to_remove = set()
-                for d in dirnames:
-                    rel_dir_path = os.path.relpath(os.path.join(dirpath, d), abs_root)
-                    if is_ignored(rel_dir_path, all_ignore_patterns): dirs_to_remove.add(d)
-                if dirs_to_remove:
-                    ignored_items_count += len(dirs_to_remove)
-                    dirnames[:] = [d for d in dirnames if d not in dirs_to_remove]
-                filenames.sort()
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    relative_filepath = os.path.relpath(filepath, abs_root).replace("\\", "/")
-                    if is_ignored(relative_filepath, all_ignore_patterns):
+    basename_re, path_re = _compile_ignore(all_ignore_patterns)
+    fence_headers, fence_footer = _fence_bytes(encoding)
+    basename_cache = {}  # Names like __init__.py or index.ts repeat across the tree.
+    output_id = None  # (st_dev, st_ino) of the open snapshot, set once it is created.
+    log_buf = []
+
+    def _log(line):
+        # One print per file costs a write() per line on a terminal; batch them.
+        log_buf.append(line + "\n")
+        if len(log_buf) >= LOG_BATCH: _flush_log()
+
+    def _flush_log():
+        if log_buf: sys.stdout.write("".join(log_buf)); log_buf.clear()
+
+    def _iter(dir_path, rel_prefix):
+        # Recursive os.scandir walk: DirEntry caches the file type, so no extra
+        # stat per entry. Ignored entries are dropped while listing, before they
+        # are sorted or type-checked, and ignored directories are never opened.
+        # Yields a directory's files before its subdirectories, matching the old
+        # os.walk(topdown=True) order.
+        nonlocal ignored_items_count
+        entries = []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    rel = rel_prefix + entry.name
+                    # Never read the snapshot being written: the pool would capture it
+                    # half-written. inode() is cached on POSIX, so stat only on a match.
+                    if entry.inode() == output_id[1] and entry.stat(follow_symlinks=False).st_dev == output_id[0]:
                         ignored_items_count += 1; continue
-                    processed_files_count += 1
-                    print(f"[PROCESS] Adding: {relative_filepath}")
-                    md_file.write(f"## {relative_filepath}\n\n")
+                    if is_ignored_fast(rel, entry.name, basename_re, path_re, basename_cache): ignored_items_count += 1
+                    else: entries.append((rel, entry))
+        except OSError as e:
+            errors.append(f"Error listing directory '{rel_prefix or '.'}': {e}")
+            _log(f"[ERROR] Could not list directory: {rel_prefix or '.'} - {e}")
+            return
+        entries.sort(key=lambda item: item[0])
+        subdirs = []
+        for rel, entry in entries:
+            if not entry.is_dir(): yield entry.path, rel
+            elif not entry.is_symlink(): subdirs.append((entry.path, rel))
+        for sub_path, rel in subdirs:
+            yield from _iter(sub_path, rel + "/")
+
+    def _prefetch(pool, files):
+        # Keeps READ_AHEAD reads in flight while yielding them in walk order.
+        pending = collections.deque()
+        for filepath, rel in files:
+            pending.append((filepath, rel, pool.submit(read_text_file, filepath, encoding)))
+            if len(pending) >= READ_AHEAD: yield pending.popleft()
+        while pending: yield pending.popleft()
+
+    try:
+        with open(output_file, "wb", buffering=IO_BUFFER_SIZE) as md_file, ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+            md_file.write("# Codebase Snapshot\n\n".encode(encoding))
+            md_file.write(f"Source Directory: `{os.path.basename(abs_root)}`\n\n".encode(encoding))
+            # Only a regular file can be truncated: pipes (-o /dev/stdout) cannot seek,
+            # and devices such as /dev/null seek but reject truncate().
+            md_stat = os.fstat(md_file.fileno())
+            md_truncatable = stat.S_ISREG(md_stat.st_mode)
+            output_id = (md_stat.st_dev, md_stat.st_ino)
+            for filepath, relative_filepath, content in _prefetch(pool, _iter(abs_root, "")):
+                processed_files_count += 1
+                if not quiet: _log(f"[PROCESS] Adding: {relative_filepath}")
+                md_file.write(f"## {relative_filepath}\n\n".encode(encoding))
+                # Only streamed files (data is None) can fail after bytes are written:
+                # a regular output file records block_start to truncate back to, otherwise
+                # the file is validated before it is copied.
+                block_start = None; streaming = False
+                try:
                     try:
-                        try:
-                             with open(filepath, "r", encoding=encoding) as f_content: content = f_content.read()
-                             language = guess_language(filepath)
-                             md_file.write(f"```{language}\n{content}\n```\n\n")
-                        except UnicodeDecodeError:
-                             md_file.write("```\n**Note:** File appears to be binary or uses an incompatible encoding.\nContent not displayed.\n```\n\n")
-                             print(f"[WARN] Binary or non-{encoding} file skipped content: {relative_filepath}")
-                        except Exception as read_err:
-                             errors.append(f"Error reading file '{relative_filepath}': {read_err}")
-                             md_file.write(f"```\n**Error reading file:** {read_err}\n```\n\n")
-                             print(f"[ERROR] Could not read file: {relative_filepath} - {read_err}")
-                    except Exception as e:
-                        errors.append(f"Error processing file '{relative_filepath}': {e}")
-                        md_file.write(f"```\n**Error processing file:** {e}\n```\n\n")
-                        print(f"[ERROR] Processing failed for: {relative_filepath} - {e}")
+                         language = guess_language(filepath)
+                         data = content.result()
+                         if data is None:
+                             if md_truncatable: block_start = md_file.tell()
+                             else: copy_text_file(filepath, None, encoding)
+                         md_file.write(fence_headers[language])
+                         if data is None:
+                             streaming = True; copy_text_file(filepath, md_file, encoding); streaming = False
+                         else: md_file.write(data)
+                         md_file.write(fence_footer)
+                    except UnicodeDecodeError:
+                         md_file.write((_open_marker_block(md_file, block_start, streaming) + "**Note:** File appears to be binary or uses an incompatible encoding.\nContent not displayed.\n```\n\n").encode(encoding))
+                         _log(f"[WARN] Binary or non-{encoding} file skipped content: {relative_filepath}")
+                    except Exception as read_err:
+                         errors.append(f"Error reading file '{relative_filepath}': {read_err}")
+                         md_file.write((_open_marker_block(md_file, block_start, streaming) + f"**Error reading file:** {read_err}\n```\n\n").encode(encoding))
+                         _log(f"[ERROR] Could not read file: {relative_filepath} - {read_err}")
+                except Exception as e:
+                    errors.append(f"Error processing file '{relative_filepath}': {e}")
+                    md_file.write(f"```\n**Error processing file:** {e}\n```\n\n".encode(encoding))
+                    _log(f"[ERROR] Processing failed for: {relative_filepath} - {e}")
     except IOError as e:
+        _flush_log()
         print(f"[ERROR] Failed to write snapshot file '{output_file}': {e}", file=sys.stderr)
         return False, processed_files_count, ignored_items_count, [f"IOError writing snapshot: {e}"]
     except Exception as e:
+        _flush_log()
         print(f"[ERROR] An unexpected error occurred during snapshot generation: {e}", file=sys.stderr)
         return False, processed_files_count, ignored_items_count, [f"Unexpected error: {e}"]
+    _flush_log()
     print("-" * 60)
     print(f"Snapshot creation finished.")
     print(f"  Processed: {processed_files_count} files")
@@ -189,43 +363,44 @@ def extract_codebase(md_file, output_dir, encoding=ENCODING):
     try:
         os.makedirs(abs_output_dir, exist_ok=True); print(f"[INFO] Ensured output directory exists: {abs_output_dir}")
     except OSError as e: print(f"[ERROR] Failed to create output directory '{abs_output_dir}': {e}", file=sys.stderr); return False, 0, [f"Failed to create output directory: {e}"]
+    relative_filepath = None; in_code_block = False; code_buf = bytearray(); skip_block_content = False
+    created_dirs = {abs_output_dir}
     try:
-        with open(md_file, "r", encoding=encoding) as f: lines = f.readlines()
-    except Exception as e: print(f"[ERROR] Failed to read snapshot file '{md_file}': {e}", file=sys.stderr); return False, 0, [f"Failed to read snapshot file: {e}"]
-    relative_filepath = None; in_code_block = False; code_lines = []; skip_block_content = False
-    for line_num, line in enumerate(lines, 1):
-        line_stripped = line.strip()
-        if line_stripped.startswith("## "):
-            if relative_filepath and code_lines and not skip_block_content:
-                file_write_attempts += 1
-                if write_code_to_file(abs_output_dir, relative_filepath, code_lines, encoding): created_files_count += 1
-                else: errors.append(f"Failed write: {relative_filepath} (ended near line {line_num})")
-            code_lines = []; relative_filepath = None; in_code_block = False; skip_block_content = False
-            new_relative_filepath = line[3:].strip().strip('/').strip('\\')
-            if not new_relative_filepath: errors.append(f"Warning: Found '##' header without a filepath on line {line_num}. Skipping.")
-            else: relative_filepath = new_relative_filepath
-        elif line_stripped.startswith("```"):
-            if in_code_block:
-                in_code_block = False
-                if relative_filepath and code_lines and not skip_block_content:
-                     file_write_attempts += 1
-                     if write_code_to_file(abs_output_dir, relative_filepath, code_lines, encoding): created_files_count += 1
-                     else: errors.append(f"Failed write: {relative_filepath} (block ended line {line_num})")
-                elif skip_block_content: pass
-                elif relative_filepath and not code_lines:
-                    file_write_attempts += 1; print(f"[WARN] Empty code block for {relative_filepath} on line {line_num}. Creating empty file.")
-                    if write_code_to_file(abs_output_dir, relative_filepath, [], encoding): created_files_count += 1
-                    else: errors.append(f"Failed write (empty): {relative_filepath}")
-                elif not relative_filepath and code_lines: errors.append(f"Warning: Code block found ending on line {line_num} without a preceding '## filepath' header. Content ignored.")
-                code_lines = []; skip_block_content = False
-            else: in_code_block = True; code_lines = []; skip_block_content = False
-        elif in_code_block:
-            if line_stripped.startswith("**Note:") or line_stripped.startswith("**Error reading file:") or line_stripped.startswith("**Binary File:"):
-                 skip_block_content = True; print(f"[INFO] Skipping content block for {relative_filepath} due to marker: {line_stripped[:30]}...")
-            if not skip_block_content: code_lines.append(line)
-    if relative_filepath and code_lines and not skip_block_content:
+        with open(md_file, "rb", buffering=IO_BUFFER_SIZE) as f:
+            for line_num, line in enumerate(f, 1):
+                c0 = line[:1]  # Cheap gate: most lines are code and match no marker.
+                if c0 == b"#" and line.startswith(b"## "):
+                    if relative_filepath and code_buf and not skip_block_content:
+                        file_write_attempts += 1
+                        if write_code_to_file(abs_output_dir, relative_filepath, code_buf, encoding, created_dirs): created_files_count += 1
+                        else: errors.append(f"Failed write: {relative_filepath} (ended near line {line_num})")
+                    code_buf = bytearray(); relative_filepath = None; in_code_block = False; skip_block_content = False
+                    new_relative_filepath = line[3:].strip().strip(b'/').strip(b'\\').decode(encoding)
+                    if not new_relative_filepath: errors.append(f"Warning: Found '##' header without a filepath on line {line_num}. Skipping.")
+                    else: relative_filepath = new_relative_filepath
+                elif c0 == b"`" and line.startswith(b"```"):
+                    if in_code_block:
+                        in_code_block = False
+                        if relative_filepath and code_buf and not skip_block_content:
+                             file_write_attempts += 1
+                             if write_code_to_file(abs_output_dir, relative_filepath, code_buf, encoding, created_dirs): created_files_count += 1
+                             else: errors.append(f"Failed write: {relative_filepath} (block ended line {line_num})")
+                        elif skip_block_content: pass
+                        elif relative_filepath and not code_buf:
+                            file_write_attempts += 1; print(f"[WARN] Empty code block for {relative_filepath} on line {line_num}. Creating empty file.")
+                            if write_code_to_file(abs_output_dir, relative_filepath, b"", encoding, created_dirs): created_files_count += 1
+                            else: errors.append(f"Failed write (empty): {relative_filepath}")
+                        elif not relative_filepath and code_buf: errors.append(f"Warning: Code block found ending on line {line_num} without a preceding '## filepath' header. Content ignored.")
+                        code_buf = bytearray(); skip_block_content = False
+                    else: in_code_block = True; code_buf = bytearray(); skip_block_content = False
+                elif in_code_block:
+                    if c0 == b"*" and (line.startswith(b"**Note:") or line.startswith(b"**Error reading file:") or line.startswith(b"**Binary File:")):
+                         skip_block_content = True; print(f"[INFO] Skipping content block for {relative_filepath} due to marker: {line.strip()[:30].decode(encoding, 'replace')}...")
+                    if not skip_block_content: code_buf += line
+    except Exception as e: print(f"[ERROR] Failed to read snapshot file '{md_file}': {e}", file=sys.stderr); return False, created_files_count, [f"Failed to read snapshot file: {e}"]
+    if relative_filepath and code_buf and not skip_block_content:
         file_write_attempts += 1
-        if write_code_to_file(abs_output_dir, relative_filepath, code_lines, encoding): created_files_count += 1
+        if write_code_to_file(abs_output_dir, relative_filepath, code_buf, encoding, created_dirs): created_files_count += 1
         else: errors.append(f"Failed write (end of file): {relative_filepath}")
     elif relative_filepath and skip_block_content: pass
     print("-" * 60); print(f"Codebase extraction finished."); print(f"  Attempted writes: {file_write_attempts}"); print(f"  Successfully created: {created_files_count} files")
@@ -254,6 +429,8 @@ def main():
     parser_fm.add_argument('--output', '-o', required=True, dest='output_markdown', help='Path for the output Markdown snapshot file.')
     # Optional ignore patterns (remains the same)
     parser_fm.add_argument('--ignore', action='append', default=[], help='Additional ignore patterns (glob style). Can be used multiple times.')
+    # Suppress the per-file progress lines (warnings and errors are still shown)
+    parser_fm.add_argument('--quiet', '-q', action='store_true', help='Do not print a line for every file added.')
 
     # --- Sub-parser for mf (Markdown to Folder) ---
     parser_mf = subparsers.add_parser('mf', help='Create Folder from Markdown.')
@@ -272,7 +449,8 @@ def main():
             output_file=args.output_markdown,    # Use '-o' arg (renamed via dest)
             encoding=ENCODING,
             base_ignore_patterns=DEFAULT_IGNORE_PATTERNS,
-            user_ignore_patterns=args.ignore
+            user_ignore_patterns=args.ignore,
+            quiet=args.quiet
         )
         if success:
             print(f"\nSuccess! Snapshot created at: {args.output_markdown}")